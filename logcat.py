@@ -8,15 +8,22 @@ logcat.py — Android Logcat Parser
 """
 
 import argparse
+import collections
+import concurrent.futures
 import subprocess
 import sys
 import re
 import json
 import csv
+import operator
 import os
+import mmap
+import queue
+import stat
+import threading
 import time
-import datetime
-from typing import Dict, Generator, Optional
+import itertools
+from typing import Dict, Generator, Iterator, List, Optional, Tuple
 
 # Попробуем подключить colorama для кроссплатформенных цветов
 try:
@@ -26,110 +33,357 @@ try:
 except ImportError:
     COLORAMA = False
 
+# fcntl есть только на Unix — через него увеличиваем буфер пайпа adb
+try:
+    import fcntl
+    FCNTL = True
+except ImportError:
+    FCNTL = False
+
+# orjson (C-расширение) сериализует JSON в разы быстрее стандартного json
+try:
+    import orjson
+    ORJSON = True
+except ImportError:
+    ORJSON = False
+
 
 # ----------- Парсинг строк логов -----------
 
-# Регексы для разных форматов
-REGEX_THREADTIME = re.compile(
-    r"^(?P<date>\d\d-\d\d)\s+(?P<time>\d\d:\d\d:\d\d\.\d+)\s+"
-    r"(?P<pid>\d+)\s+(?P<tid>\d+)\s+(?P<level>[VDIWEF])\s+(?P<tag>[^:]+):\s+(?P<msg>.*)$"
+LEVELS = "VDIWEF"
+
+# Регексы для разных форматов. Имена групп уникальны для каждой ветки,
+# чтобы все три формата можно было склеить в одну альтернацию.
+# Ни одна часть шаблона не захватывает перевод строки: тот же регекс
+# прогоняется по целому файлу через finditer.
+PATTERN_THREADTIME = (
+    r"(?P<tt_date>\d\d-\d\d)[ \t]+(?P<tt_time>\d\d:\d\d:\d\d\.\d+)[ \t]+"
+    r"(?P<tt_pid>\d+)[ \t]+(?P<tt_tid>\d+)[ \t]+(?P<tt_level>[VDIWEF])[ \t]+(?P<tt_tag>[^:\n]+):[ \t]+(?P<tt_msg>.*)"
+)
+
+PATTERN_TIME = (
+    r"(?P<tm_date>\d\d-\d\d)[ \t]+(?P<tm_time>\d\d:\d\d:\d\d\.\d+)[ \t]+"
+    r"(?P<tm_level>[VDIWEF])[ \t]+(?P<tm_tag>[^:\n]+):[ \t]+(?P<tm_msg>.*)"
 )
 
-REGEX_TIME = re.compile(
-    r"^(?P<date>\d\d-\d\d)\s+(?P<time>\d\d:\d\d:\d\d\.\d+)\s+"
-    r"(?P<level>[VDIWEF])\s+(?P<tag>[^:]+):\s+(?P<msg>.*)$"
+PATTERN_EPOCH = (
+    r"(?P<ep_epoch>\d+\.\d+)[ \t]+(?P<ep_pid>\d+)[ \t]+(?P<ep_tid>\d+)[ \t]+"
+    r"(?P<ep_level>[VDIWEF])[ \t]+(?P<ep_tag>[^:\n]+):[ \t]+(?P<ep_msg>.*)"
 )
 
-REGEX_EPOCH = re.compile(
-    r"^(?P<epoch>\d+\.\d+)\s+(?P<pid>\d+)\s+(?P<tid>\d+)\s+"
-    r"(?P<level>[VDIWEF])\s+(?P<tag>[^:]+):\s+(?P<msg>.*)$"
+# Один проход регекса на строку: формат определяется по сработавшей ветке.
+# Регекс работает по байтам — в str декодируем только tag и msg разобранных строк.
+REGEX_ANY = re.compile(
+    (r"(?m)^(?:" + PATTERN_THREADTIME + r"|" + PATTERN_TIME + r"|" + PATTERN_EPOCH + r")$").encode()
 )
 
 
-def detect_format(line: str) -> str:
-    """Определяем формат лога по строке"""
-    if REGEX_THREADTIME.match(line):
-        return "threadtime"
-    elif REGEX_TIME.match(line):
-        return "time"
-    elif REGEX_EPOCH.match(line):
-        return "epoch"
-    return "unknown"
-
-
-def parse_line(line: str, fmt: str) -> Optional[Dict]:
-    """Парсим строку лога в словарь"""
-    m = None
-    if fmt == "threadtime":
-        m = REGEX_THREADTIME.match(line)
-    elif fmt == "time":
-        m = REGEX_TIME.match(line)
-    elif fmt == "epoch":
-        m = REGEX_EPOCH.match(line)
-
-    if not m:
-        return None
+def _group_indexes(*names: str) -> tuple:
+    return tuple(REGEX_ANY.groupindex[n] for n in names)
 
-    gd = m.groupdict()
 
-    # timestamp → datetime
-    if fmt == "epoch":
-        ts = datetime.datetime.utcfromtimestamp(float(gd["epoch"]))
-    else:
-        year = datetime.datetime.now().year
-        dt_str = f"{year}-{gd['date']} {gd['time']}"
-        ts = datetime.datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S.%f")
-
-    rec = {
-        "ts_raw": gd.get("epoch") or f"{gd['date']} {gd['time']}",
-        "ts_iso": ts.isoformat(),
-        "pid": int(gd["pid"]) if gd.get("pid") else None,
-        "tid": int(gd["tid"]) if gd.get("tid") else None,
-        "level": gd["level"],
-        "tag": gd["tag"].strip(),
-        "msg": gd["msg"],
-    }
-    return rec
+# Номера групп каждой ветки — достаем их через m.group(*idx) без groupdict()
+_GROUPS_THREADTIME = _group_indexes(
+    "tt_date", "tt_time", "tt_pid", "tt_tid", "tt_level", "tt_tag", "tt_msg"
+)
+_GROUPS_TIME = _group_indexes("tm_date", "tm_time", "tm_level", "tm_tag", "tm_msg")
+_GROUPS_EPOCH = _group_indexes("ep_epoch", "ep_pid", "ep_tid", "ep_level", "ep_tag", "ep_msg")
+
+
+# Год в логах threadtime/time не пишется — берем текущий. Чтобы не
+# спрашивать время на каждую строку, помним момент, когда год сменится
+_YEAR = 0
+_YEAR_END = 0.0
+
+
+def _current_year() -> int:
+    global _YEAR, _YEAR_END
+    now = time.time()
+    if now >= _YEAR_END:
+        _YEAR = time.localtime(now).tm_year
+        _YEAR_END = time.mktime((_YEAR + 1, 1, 1, 0, 0, 0, 0, 0, -1))
+    return _YEAR
+
+
+def _date_time_iso(date: str, time_: str) -> str:
+    """Собираем ISO-время из "MM-DD" и "HH:MM:SS.fff" без strptime"""
+    year = _current_year()
+    # Дробную часть приводим к микросекундам, как datetime.isoformat()
+    frac = time_[9:15].ljust(6, "0")
+    if frac == "000000":
+        return f"{year}-{date}T{time_[:8]}"
+    return f"{year}-{date}T{time_[:8]}.{frac}"
+
+
+# Уровень в пачке храним номером в LEVELS: фильтр --min-level — сравнение чисел
+_LEVEL_IDX = {c.encode(): i for i, c in enumerate(LEVELS)}
+
+# Уровни и теги повторяются из строки в строку: храним по одному
+# интернированному экземпляру, сравнение в фильтрах идет по указателю
+_LEVEL_STR = tuple(sys.intern(c) for c in LEVELS)
+
+# Сырой тег → готовая строка; уникальных тегов обычно сотни
+_TAG_CACHE: Dict[bytes, str] = {}
+_TAG_CACHE_SIZE = 4096
+
+
+def _intern_tag(raw: bytes) -> str:
+    tag = sys.intern(raw.decode("utf-8", "ignore").strip())
+    if len(_TAG_CACHE) >= _TAG_CACHE_SIZE:
+        _TAG_CACHE.clear()
+    _TAG_CACHE[raw] = tag
+    return tag
+
+
+def _epoch_iso(epoch: str) -> str:
+    """Собираем ISO-время (UTC) из "секунды.доли" без datetime"""
+    sec, _, frac = epoch.partition(".")
+    tm = time.gmtime(int(sec))
+    iso = (
+        f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+        f"T{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}"
+    )
+    frac = frac[:6].ljust(6, "0")
+    if frac == "000000":
+        return iso
+    return f"{iso}.{frac}"
+
+
+def _ts_iso(ts_raw: str) -> str:
+    """ISO-время по сырому timestamp любого из форматов"""
+    if " " in ts_raw:
+        return _date_time_iso(ts_raw[:5], ts_raw[6:])
+    return _epoch_iso(ts_raw)
+
+
+# Сырой timestamp → (ts_raw, ts_iso): строки одной пачки событий часто
+# приходят с одинаковым временем вплоть до миллисекунды
+_TS_CACHE: Dict[bytes, tuple] = {}
+_TS_CACHE_SIZE = 1024
+
+
+def _cache_ts(raw: bytes) -> tuple:
+    ts_raw = raw.decode()
+    ts = (ts_raw, _ts_iso(ts_raw))
+    # Время в логе идет вперед, старые значения больше не встретятся —
+    # вместо вытеснения по одному просто начинаем кэш заново
+    if len(_TS_CACHE) >= _TS_CACHE_SIZE:
+        _TS_CACHE.clear()
+    _TS_CACHE[raw] = ts
+    return ts
+
+
+class Rec:
+    """Запись лога (__slots__ вместо dict: меньше памяти и быстрее доступ к полям)"""
+
+    __slots__ = ("ts_raw", "ts_iso", "pid", "tid", "level", "tag", "msg")
+
+    def __init__(self, ts_raw, ts_iso, pid, tid, level, tag, msg):
+        self.ts_raw = ts_raw
+        self.ts_iso = ts_iso
+        self.pid = pid
+        self.tid = tid
+        self.level = level
+        self.tag = tag
+        self.msg = msg
+
+    def __reduce__(self):
+        # Компактный pickle для передачи записей из воркеров
+        return Rec, (self.ts_raw, self.ts_iso, self.pid, self.tid, self.level, self.tag, self.msg)
+
+    def as_dict(self) -> Dict:
+        """dict для экспорта в JSON"""
+        return {
+            "ts_raw": self.ts_raw,
+            "ts_iso": self.ts_iso,
+            "pid": self.pid,
+            "tid": self.tid,
+            "level": self.level,
+            "tag": self.tag,
+            "msg": self.msg,
+        }
+
+
+class BatchBuffer:
+    """Пачка разобранных строк в колоночном виде (SoA).
+
+    Поля лежат параллельными списками почти в сыром виде: строки
+    остаются bytes, уровень хранится номером в LEVELS. Фильтр
+    прогоняется по колонкам, а Rec собирается и декодируется только
+    для прошедших его строк.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.stamp = []
+        self.pid = []
+        self.tid = []
+        self.level = []
+        self.tag = []
+        self.msg = []
+
+    def __len__(self):
+        return len(self.msg)
+
+    def records(self, pred=None) -> Generator[Rec, None, None]:
+        """Собираем записи для строк, прошедших фильтр"""
+        rows = range(len(self.msg))
+        if pred is not None:
+            mask = map(pred, self.level, self.tag, self.pid, self.msg)
+            rows = itertools.compress(rows, mask)
+
+        stamp, pid, tid, level, tag, msg = (
+            self.stamp, self.pid, self.tid, self.level, self.tag, self.msg
+        )
+        ts_cache = _TS_CACHE
+        for i in rows:
+            ts = ts_cache.get(stamp[i])
+            if ts is None:
+                ts = _cache_ts(stamp[i])
+            p, t = pid[i], tid[i]
+            yield Rec(
+                ts[0],
+                ts[1],
+                int(p) if p else None,
+                int(t) if t else None,
+                _LEVEL_STR[level[i]],
+                tag[i],
+                msg[i].decode("utf-8", "ignore"),
+            )
+
+
+def parse_batch(matches, batch: BatchBuffer) -> BatchBuffer:
+    """Раскладываем совпадения REGEX_ANY (None — строка не разобрана) по колонкам пачки"""
+    stamp, pid, tid, level, tag, msg = (
+        batch.stamp.append, batch.pid.append, batch.tid.append,
+        batch.level.append, batch.tag.append, batch.msg.append,
+    )
+    ep_first, tt_first = _GROUPS_EPOCH[0], _GROUPS_THREADTIME[0]
+    tag_cache = _TAG_CACHE
+    level_idx = _LEVEL_IDX
+
+    for m in matches:
+        if m is None:
+            continue
+        # Ветка альтернации, в которой сработала первая группа, и есть формат
+        if m.group(ep_first) is not None:
+            ts, p, t, lvl, tg, ms = m.group(*_GROUPS_EPOCH)
+        elif m.group(tt_first) is not None:
+            date, time_, p, t, lvl, tg, ms = m.group(*_GROUPS_THREADTIME)
+            ts = date + b" " + time_
+        else:
+            date, time_, lvl, tg, ms = m.group(*_GROUPS_TIME)
+            ts = date + b" " + time_
+            p = t = None
+        stamp(ts)
+        pid(p)
+        tid(t)
+        level(level_idx[lvl])
+        tg_str = tag_cache.get(tg)
+        tag(tg_str if tg_str is not None else _intern_tag(tg))
+        msg(ms)
+
+    return batch
 
 
 # ----------- Фильтры -----------
 
 def make_filters(args):
-    """Создаем список фильтров на основе аргументов"""
-    filters = []
+    """Собираем активные фильтры в одну функцию-предикат по колонкам пачки (None — фильтров нет)"""
+    stmts = []
+    env = {}
+
+    # Условия идут по возрастанию цены: чем раньше отсеяли строку,
+    # тем реже доходим до декодирования и регекса
 
-    if args.min_level:
-        levels = "VDIWEF"
-        min_idx = levels.index(args.min_level)
-        filters.append(lambda r: levels.index(r["level"]) >= min_idx)
+    if args.min_level and args.min_level != LEVELS[0]:
+        env["_MIN_LEVEL"] = LEVELS.index(args.min_level)
+        stmts.append("if level < _MIN_LEVEL: return False")
+
+    if args.pid:
+        env["_PID"] = args.pid
+        stmts.append("if pid is None or int(pid) != _PID: return False")
 
     if args.tag:
-        allowed_tags = set(args.tag)
-        filters.append(lambda r: r["tag"] in allowed_tags)
+        env["_TAGS"] = frozenset(sys.intern(t) for t in args.tag)
+        stmts.append("if tag not in _TAGS: return False")
+
+    # Сообщение в пачке лежит байтами: подстроку с учетом регистра ищем
+    # прямо в них, для -i и регекса декодируем один раз
+    if args.contains and not args.ignore_case:
+        env["_SUBSTR"] = args.contains.encode("utf-8")
+        stmts.append("if _SUBSTR not in msg: return False")
+
+    if args.grep or (args.contains and args.ignore_case):
+        stmts.append('msg = msg.decode("utf-8", "ignore")')
+
+    if args.contains and args.ignore_case:
+        env["_SUBSTR"] = args.contains.lower()
+        stmts.append("if _SUBSTR not in msg.lower(): return False")
 
     if args.grep:
-        regex = re.compile(args.grep, re.I if args.ignore_case else 0)
-        filters.append(lambda r: regex.search(r["msg"]) is not None)
+        env["_SEARCH"] = re.compile(args.grep, re.I if args.ignore_case else 0).search
+        stmts.append("if _SEARCH(msg) is None: return False")
 
-    if args.contains:
-        substr = args.contains.lower() if args.ignore_case else args.contains
-        filters.append(
-            lambda r: substr in (r["msg"].lower() if args.ignore_case else r["msg"])
-        )
+    if not stmts:
+        return None
 
-    if args.pid:
-        filters.append(lambda r: r["pid"] == args.pid)
+    # Один вызов на строку вместо all() по списку замыканий
+    src = "def _pred(level, tag, pid, msg):\n"
+    src += "".join(f"    {st}\n" for st in stmts)
+    src += "    return True\n"
+    exec(src, env)
+    return env["_pred"]
 
-    def apply_all(rec):
-        return all(f(rec) for f in filters)
 
-    return apply_all
+def make_line_filter(args):
+    """Дешевая проверка сырой строки до разбора (None, если проверять нечего)"""
+    if not args.contains:
+        return None
+    # Сообщение — хвост строки: если подстроки нет во всей строке, нет и в msg
+    if args.ignore_case:
+        substr = args.contains.lower()
+        return lambda line: substr in line.decode("utf-8", "ignore").lower()
+    # С учетом регистра можно сравнивать байты, не декодируя строку
+    substr = args.contains.encode("utf-8")
+    return lambda line: substr in line
 
 
 # ----------- Источники -----------
 
-def iter_adb_lines(args) -> Generator[str, None, None]:
-    """Читаем строки из ADB"""
+# Размер блока при чтении файла и из adb
+READ_CHUNK = 1 << 20
+
+# Буфер пайпа adb → скрипт
+ADB_PIPE_SIZE = 1 << 20
+
+# Сколько совпадений отдаем за раз при разборе файла через mmap
+MATCH_BATCH = 8192
+
+
+def _split_block(data: bytes):
+    """Режем блок на строки; незаконченную последнюю строку возвращаем отдельно"""
+    lines = data.splitlines()
+    if data.endswith((b"\n", b"\r")):
+        return lines, b""
+    return lines, lines.pop()
+
+
+def _grow_pipe(f) -> None:
+    """Увеличиваем буфер пайпа (только Linux), чтобы adb не вставал, пока мы разбираем пачку"""
+    if not FCNTL or not hasattr(fcntl, "F_SETPIPE_SZ"):
+        return
+    try:
+        fcntl.fcntl(f.fileno(), fcntl.F_SETPIPE_SZ, ADB_PIPE_SIZE)
+    except OSError:
+        # Больше /proc/sys/fs/pipe-max-size без прав не дадут — остаемся на стандартном
+        pass
+
+
+def iter_adb_batches(args) -> Generator[List[bytes], None, None]:
+    """Читаем строки из ADB пачками — всем, что успело прийти (байты, без декодирования)"""
     adb = args.adb_path or "adb"
     cmd = [adb]
     if args.serial:
@@ -142,26 +396,164 @@ def iter_adb_lines(args) -> Generator[str, None, None]:
     if args.clear:
         subprocess.run(cmd + ["-c"])
 
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    for line in proc.stdout:
-        yield line.rstrip("\n")
-
-
-def iter_file_lines(path: str, follow=False) -> Generator[str, None, None]:
-    """Читаем строки из файла"""
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=ADB_PIPE_SIZE
+    )
+    _grow_pipe(proc.stdout)
+
+    # read1 отдает то, что уже есть в пайпе, и ждет только когда он пуст:
+    # живой поток не задерживается, а при потоке логов пачки получаются крупными
+    read1 = proc.stdout.read1
+    tail = b""
+    while True:
+        chunk = read1(READ_CHUNK)
+        if not chunk:
+            break
+        lines, tail = _split_block(tail + chunk)
+        if lines:
+            yield lines
+    if tail:
+        yield [tail]
+
+
+def iter_file_batches(path: str, follow=False) -> Generator[List[bytes], None, None]:
+    """Читаем строки из файла пачками по блоку (байты, без декодирования)"""
+    with open(path, "rb") as f:
+        tail = b""
         while True:
-            line = f.readline()
-            if not line:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
                 if follow:
                     time.sleep(0.2)
                     continue
                 break
-            yield line.rstrip("\n")
+            # Незаконченную последнюю строку оставляем до следующего чтения
+            lines, tail = _split_block(tail + chunk)
+            yield lines
+        if tail:
+            yield [tail]
+
+
+def iter_matches(batches, line_flt=None) -> Generator[Iterator, None, None]:
+    """Пачки строк → пачки совпадений REGEX_ANY (None — строка не разобрана)"""
+    match = REGEX_ANY.match
+    for lines in batches:
+        if line_flt:
+            lines = filter(line_flt, lines)
+        yield map(match, lines)
+
+
+def iter_file_matches(path: str, line_flt=None) -> Generator[Iterator, None, None]:
+    """Разбираем файл целиком: REGEX_ANY.finditer по mmap без нарезки на строки"""
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        # mmap не годится для пайпов и пустых файлов
+        if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+            yield from iter_matches(iter_file_batches(path), line_flt)
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # В CRLF-файлах "\r" попал бы в конец msg — их режем на строки по-старому
+            if mm.find(b"\r") != -1:
+                yield from iter_matches(iter_file_batches(path), line_flt)
+                return
+
+            # Подстроку --contains здесь проверит предикат по msg
+            matches = REGEX_ANY.finditer(mm)
+            try:
+                while True:
+                    chunk = list(itertools.islice(matches, MATCH_BATCH))
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                # Итератор держит буфер mmap — без этого mm не закроется
+                del matches
+
+
+def iter_records(match_batches, flt=None) -> Generator[Iterator[Rec], None, None]:
+    """Пачки совпадений → пачки записей, прошедших фильтр"""
+    # Все, что нужно в цикле, — в локальных именах (LOAD_FAST вместо
+    # поиска по globals и атрибутам на каждой итерации)
+    batch = BatchBuffer()
+    parse = parse_batch
+    records = batch.records
+    clear = batch.clear
+    for matches in match_batches:
+        parse(matches, batch)
+        yield records(flt)
+        clear()
+
+
+# ----------- Параллельный разбор -----------
+
+# Кусок файла на одну задачу воркера и минимальный размер файла,
+# с которого имеет смысл поднимать пул процессов
+PARALLEL_CHUNK = 16 << 20
+PARALLEL_MIN_SIZE = 32 << 20
+
+
+def available_cpus() -> int:
+    """Сколько ядер реально доступно процессу (с учетом affinity и ограничений контейнера)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def file_ranges(path: str, chunk: int = PARALLEL_CHUNK) -> Optional[List[Tuple[int, int]]]:
+    """Делим файл на куски [start, end) по границам строк (None — файл не подходит)"""
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode) or st.st_size < PARALLEL_MIN_SIZE:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # CRLF-файлы идут через построчное чтение, см. iter_file_matches
+            if mm.find(b"\r") != -1:
+                return None
+            ranges = []
+            start = 0
+            while start < st.st_size:
+                nl = mm.find(b"\n", min(start + chunk, st.st_size) - 1)
+                end = st.st_size if nl == -1 else nl + 1
+                ranges.append((start, end))
+                start = end
+            return ranges
+
+
+def _parse_range(path: str, start: int, end: int, args) -> List[Rec]:
+    """Задача воркера: разбираем и фильтруем кусок файла [start, end)"""
+    # Сгенерированный предикат не сериализуется — собираем его в воркере
+    flt = make_filters(args)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        matches = REGEX_ANY.finditer(mm, start, end)
+        batch = parse_batch(matches, BatchBuffer())
+        del matches
+    return list(batch.records(flt))
+
+
+def iter_parallel_records(path: str, ranges, args, jobs: int) -> Generator[List[Rec], None, None]:
+    """Разбираем куски файла в пуле процессов и отдаем записи в исходном порядке"""
+    ex = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+    try:
+        # Держим в работе не больше 2 задач на воркер, чтобы не копить
+        # результаты в памяти, если запись не успевает за разбором
+        pending = collections.deque()
+        for start, end in ranges:
+            pending.append(ex.submit(_parse_range, path, start, end, args))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        ex.shutdown(cancel_futures=True)
 
 
 # ----------- Writers -----------
 
+# Размер буфера файлов с результатом
+BUFFER_SIZE = 1 << 18
+
+
 class TTYWriter:
     """Человекочитаемый вывод"""
 
@@ -174,35 +566,72 @@ class TTYWriter:
         "F": Fore.RED + Style.BRIGHT if COLORAMA else "",
     }
 
+    # Сколько строк копим перед записью, если stdout — не терминал
+    BATCH = 4096
+
     def __init__(self, args):
         self.args = args
+        # Цвета уровней и сброс считаем один раз, а не на каждую строку
+        if args.no_color:
+            self._colors, self._reset = {}, ""
+        else:
+            self._colors = self.COLORS
+            self._reset = Style.RESET_ALL if COLORAMA else ""
+        # Пишем через sys.stdout, а не его .buffer: colorama оборачивает
+        # sys.stdout и убирает/конвертирует ANSI-коды, когда это нужно
+        self._write = sys.stdout.write
+        self._flush = sys.stdout.flush
+        self._buf = []
+        # В терминал пишем сразу, как print(); в пайп или файл — пачками
+        self._batch = 1 if sys.stdout.isatty() else self.BATCH
 
     def write(self, rec):
-        ts = rec["ts_iso"].split("T")[1]
-        pid = rec["pid"] or "-"
-        tid = rec["tid"] or "-"
-        lvl = rec["level"]
-        color = self.COLORS.get(lvl, "")
-        reset = Style.RESET_ALL if COLORAMA else ""
-        msg = rec["msg"]
-
-        if self.args.no_color:
-            color = reset = ""
-
-        print(f"{ts} {pid}/{tid} {color}{lvl}{reset} {rec['tag']}: {msg}")
+        ts = rec.ts_iso.split("T")[1]
+        pid = rec.pid or "-"
+        tid = rec.tid or "-"
+        lvl = rec.level
+        color = self._colors.get(lvl, "")
+        reset = self._reset
+        msg = rec.msg
+
+        self._buf.append(f"{ts} {pid}/{tid} {color}{lvl}{reset} {rec.tag}: {msg}\n")
+        if len(self._buf) >= self._batch:
+            self.flush()
+
+    def flush(self):
+        if self._buf:
+            try:
+                self._write("".join(self._buf))
+                self._flush()
+            finally:
+                # Даже если запись упала (например, закрыт пайп), второй раз
+                # ту же пачку из close() не пишем
+                self._buf.clear()
 
     def close(self):
-        pass
+        self.flush()
 
 
 class JSONWriter:
     def __init__(self, path, indent=None):
-        self.f = open(path, "w", encoding="utf-8")
-        self.indent = indent
+        self.f = open(path, "wb", buffering=BUFFER_SIZE)
+
+        # orjson умеет только отступ в 2 пробела — остальное отдаем stdlib
+        if ORJSON and indent in (None, 2):
+            option = orjson.OPT_APPEND_NEWLINE
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            self._dumps = lambda rec: orjson.dumps(rec.as_dict(), option=option)
+        else:
+            encode = json.JSONEncoder(
+                ensure_ascii=False,
+                indent=indent,
+                separators=(",", ":") if indent is None else None,
+            ).encode
+            self._dumps = lambda rec: (encode(rec.as_dict()) + "\n").encode("utf-8")
 
     def write(self, rec):
-        json.dump(rec, self.f, ensure_ascii=False, indent=self.indent)
-        self.f.write("\n")
+        self.f.write(self._dumps(rec))
 
     def close(self):
         self.f.close()
@@ -210,19 +639,72 @@ class JSONWriter:
 
 class CSVWriter:
     def __init__(self, path):
-        self.f = open(path, "w", newline="", encoding="utf-8")
+        self.f = open(path, "w", newline="", encoding="utf-8", buffering=BUFFER_SIZE)
         self.w = None
+        self._row = None
 
     def write(self, rec):
         if not self.w:
-            self.w = csv.DictWriter(self.f, fieldnames=list(rec.keys()))
-            self.w.writeheader()
-        self.w.writerow(rec)
+            # Поля берем прямо из слотов записи, без промежуточного dict
+            fields = Rec.__slots__
+            self._row = operator.attrgetter(*fields)
+            self.w = csv.writer(self.f)
+            self.w.writerow(fields)
+        self.w.writerow(self._row(rec))
 
     def close(self):
         self.f.close()
 
 
+class WriterThread(threading.Thread):
+    """Отдаем записи writers в отдельном потоке: разбор не ждет форматирования и I/O"""
+
+    # Сколько пачек записей может ждать в очереди (дальше разбор встает)
+    QUEUE_SIZE = 8
+
+    _STOP = object()
+
+    def __init__(self, writers):
+        super().__init__(name="writer", daemon=True)
+        self.writers = writers
+        self.queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.error = None
+
+    def run(self):
+        get = self.queue.get
+        writes = [w.write for w in self.writers]
+        try:
+            while True:
+                recs = get()
+                if recs is self._STOP:
+                    return
+                for rec in recs:
+                    for write in writes:
+                        write(rec)
+        except BaseException as e:
+            self.error = e
+            # Разгребаем очередь до конца, чтобы put() в основном потоке не завис
+            while get() is not self._STOP:
+                pass
+
+    def put(self, recs):
+        if self.error is not None:
+            self._raise()
+        self.queue.put(recs)
+
+    def finish(self):
+        """Дописываем все, что в очереди, и ждем поток"""
+        self.queue.put(self._STOP)
+        self.join()
+        if self.error is not None:
+            self._raise()
+
+    def _raise(self):
+        # Ошибку writer пробрасываем в основной поток один раз
+        error, self.error = self.error, None
+        raise error
+
+
 # ----------- Main -----------
 
 def main():
@@ -236,9 +718,10 @@ def main():
     p.add_argument("--buffer", default="main", help="Буфер (main, system, events, radio, crash, all)")
     p.add_argument("--format", default="threadtime", help="Формат вывода adb (time, threadtime, epoch)")
     p.add_argument("--clear", action="store_true", help="Очистить буфер перед стартом")
+    p.add_argument("-j", "--jobs", type=int, help="Процессов для разбора большого файла (по умолчанию — по числу ядер)")
 
     # Фильтры
-    p.add_argument("--min-level", choices=list("VDIWEF"))
+    p.add_argument("--min-level", choices=list(LEVELS))
     p.add_argument("--tag", nargs="+", help="Фильтр по тегам")
     p.add_argument("--grep", help="Регекс по сообщению")
     p.add_argument("--contains", help="Подстрока в сообщении")
@@ -253,27 +736,24 @@ def main():
 
     args = p.parse_args()
 
-    # Источник
-    if args.adb:
-        src = iter_adb_lines(args)
-    else:
-        src = iter_file_lines(args.input)
-
-    # Определяем формат (для файлов auto)
-    fmt = args.format
-    if not args.adb and args.format == "auto":
-        for l in src:
-            fmt = detect_format(l)
-            if fmt != "unknown":
-                first_line = l
-                break
-        else:
-            print("Не удалось определить формат", file=sys.stderr)
-            return
-        src = [first_line] + list(iter_file_lines(args.input))
-
     # Фильтры
     flt = make_filters(args)
+    line_flt = make_line_filter(args)
+
+    # Источник: пачки записей, уже прошедших фильтры.
+    # Большой файл разбираем в несколько процессов, если вывод не в терминал
+    # (в терминале важнее увидеть первые строки сразу)
+    ranges = None
+    jobs = args.jobs or available_cpus()
+    if args.input and jobs > 1 and (args.json or args.csv or not sys.stdout.isatty()):
+        ranges = file_ranges(args.input)
+
+    if ranges:
+        src = iter_parallel_records(args.input, ranges, args, jobs)
+    elif args.adb:
+        src = iter_records(iter_matches(iter_adb_batches(args), line_flt), flt)
+    else:
+        src = iter_records(iter_file_matches(args.input, line_flt), flt)
 
     # Writers
     writers = []
@@ -284,20 +764,23 @@ def main():
     if not writers:
         writers.append(TTYWriter(args))
 
+    out = WriterThread(writers)
+    out.start()
     try:
-        for line in src:
-            rec = parse_line(line, fmt)
-            if not rec:
-                continue
-            if not flt(rec):
-                continue
-            for w in writers:
-                w.write(rec)
+        put = out.put
+        for recs in src:
+            # Пачку материализуем: BatchBuffer переиспользуется под следующую
+            recs = list(recs)
+            if recs:
+                put(recs)
     except KeyboardInterrupt:
         pass
     finally:
-        for w in writers:
-            w.close()
+        try:
+            out.finish()
+        finally:
+            for w in writers:
+                w.close()
 
 
 if __name__ == "__main__":